@@ -7,7 +7,6 @@ from flask_socketio import SocketIO, emit, join_room, leave_room
 from authlib.integrations.flask_client import OAuth
 from werkzeug.middleware.proxy_fix import ProxyFix
 import random
-import string
 import os
 
 # Import Logic Modules
@@ -23,13 +22,21 @@ app.config['GOOGLE_CLIENT_ID'] = "58224886652-jpcqllauehf5ngpui98b29i3o6345ksr.a
 app.config['GOOGLE_CLIENT_SECRET'] = "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"
 
 oauth = OAuth(app)
-google = oauth.register(
-    name='google',
-    client_id=app.config['GOOGLE_CLIENT_ID'],
-    client_secret=app.config['GOOGLE_CLIENT_SECRET'],
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={'scope': 'openid email profile'}
-)
+_google = None
+
+def _get_google():
+    # Lazy registration: OIDC discovery does network I/O, so defer it to
+    # the first login instead of paying for it on every worker boot.
+    global _google
+    if _google is None:
+        _google = oauth.register(
+            name='google',
+            client_id=app.config['GOOGLE_CLIENT_ID'],
+            client_secret=app.config['GOOGLE_CLIENT_SECRET'],
+            server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+            client_kwargs={'scope': 'openid email profile'}
+        )
+    return _google
 
 socketio = SocketIO(app, async_mode='eventlet')
 
@@ -37,8 +44,10 @@ socketio = SocketIO(app, async_mode='eventlet')
 ROOMS = {}
 
 def generate_room_code():
+    # Int keys: integer hashing is cheaper than string hashing on the
+    # per-message ROOMS lookups, and 1000-9999 still displays as 4 digits.
     while True:
-        code = ''.join(random.choices(string.digits, k=4))
+        code = random.randint(1000, 9999)
         if code not in ROOMS: return code
 
 # --- ROUTES ---
@@ -57,12 +66,12 @@ def login():
     if 'onrender.com' in redirect_uri and redirect_uri.startswith('http://'):
         redirect_uri = redirect_uri.replace('http://', 'https://', 1)
         
-    print(f"DEBUG: Redirecting to Google with callback: {redirect_uri}") 
-    return google.authorize_redirect(redirect_uri)
+    print(f"DEBUG: Redirecting to Google with callback: {redirect_uri}")
+    return _get_google().authorize_redirect(redirect_uri)
 
 @app.route('/auth/callback')
 def auth():
-    token = google.authorize_access_token()
+    token = _get_google().authorize_access_token()
     user_info = token.get('userinfo')
     session['user'] = user_info
     session['username'] = user_info['given_name']
@@ -100,14 +109,18 @@ def handle_create_room():
 @socketio.on('join_room')
 def handle_join_room(data):
     username = session.get('username')
-    code = data['code']
-    
-    if code in ROOMS:
-        room = ROOMS[code]
+    try:
+        code = int(data['code'])
+    except (TypeError, ValueError):
+        emit('error_msg', {'msg': 'Invalid Room Code'})
+        return
+
+    room = ROOMS.get(code)
+    if room is not None:
         if room['status'] != 'lobby':
             emit('error_msg', {'msg': 'Game already started!'})
             return
-            
+
         original_name = username
         counter = 2
         temp_name = username
@@ -132,10 +145,10 @@ def handle_start_game(data):
     username = session.get('username')
     code = session.get('room_code')
     game_type = data['game_type']
-    
-    if code in ROOMS:
-        room = ROOMS[code]
-        if room['host'] != username: return 
+
+    room = ROOMS.get(code)
+    if room is not None:
+        if room['host'] != username: return
         
         room['game_type'] = game_type
         room['status'] = 'playing'
@@ -153,15 +166,20 @@ def handle_start_game(data):
 def handle_action(data):
     username = session.get('username')
     code = session.get('room_code')
-    if code in ROOMS:
-        room = ROOMS[code]
+    room = ROOMS.get(code)
+    if room is not None:
         game = room['game_instance']
-        if room['game_type'] == 'pickpass':
-            state = game.play_turn(data['action'], player_name_check=username)
-            state['game_type'] = 'pickpass'
-            socketio.emit('update_game', state, room=code)
+        game_type = room['game_type']
+        if game_type == 'pickpass':
+            kind, payload = game.play_turn(data['action'], player_name_check=username)
+            payload['game_type'] = 'pickpass'
+            # Passes only change pot/chips/turn: ship the small delta and
+            # let clients patch their cached state instead of re-sending
+            # the whole players list.
+            event = 'game_delta' if kind == 'delta' else 'update_game'
+            socketio.emit(event, payload, room=code)
             check_bot_turn_pickpass(room)
-        elif room['game_type'] == 'bidwiser':
+        elif game_type == 'bidwiser':
             has_changed = game.register_move(username, int(data['card']))
             if has_changed:
                 state = game.get_state()
@@ -169,13 +187,28 @@ def handle_action(data):
                 socketio.emit('update_game', state, room=code)
 
 def check_bot_turn_pickpass(room):
+    # Coalesce adjacent bot moves into one emit (max 3 per frame) so a
+    # streak of bots costs one socket write and one client re-render.
     game = room['game_instance']
-    state = game.get_state()
-    while not state['game_over'] and not state['players'][state['current_player']]['is_human']:
-        socketio.sleep(1.0)
+    pending_moves = []
+    while game.is_bot_turn():
+        bot_name = game.names[game.current_player_idx]
+        card = game.current_card
         action = 'take' if game.bot_move() else 'pass'
-        state = game.play_turn(action)
+        game.play_turn(action)
+        pending_moves.append({'player': bot_name, 'action': action, 'card': card})
+        if len(pending_moves) >= 3:
+            socketio.sleep(1.0)
+            state = game.get_state()
+            state['game_type'] = 'pickpass'
+            state['bot_moves'] = pending_moves
+            socketio.emit('update_game', state, room=room['code'])
+            pending_moves = []
+    if pending_moves:
+        socketio.sleep(1.0)
+        state = game.get_state()
         state['game_type'] = 'pickpass'
+        state['bot_moves'] = pending_moves
         socketio.emit('update_game', state, room=room['code'])
 
 if __name__ == '__main__':
@@ -1,9 +1,41 @@
+import functools
 import random
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # -----------------------------------------------------------------------------
 # GAME LOGIC UTILITIES
 # -----------------------------------------------------------------------------
-def resolve_round_logic(p1_card, p2_card, current_pot):
+# Hands are bitmasks over the cards 1..13: bit (card - 1) is set iff the card
+# is still held. Membership and removal are single bit operations, and the
+# masks double as cheap, canonical cache keys.
+FULL_HAND_MASK = (1 << 13) - 1
+
+def _has(mask, card):
+    return mask & (1 << (card - 1)) != 0
+
+def _bits_to_list(mask):
+    """ Decode a hand mask into an ascending list of cards. """
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length())
+        mask ^= low
+    return cards
+
+# Card-sum of every possible hand mask, built once by dynamic programming
+# (8192 small ints). Turns sum(hand) inside the minimax loops into a lookup.
+_MASK_SUM = [0] * (1 << 13)
+for _m in range(1, 1 << 13):
+    _low = _m & -_m
+    _MASK_SUM[_m] = _MASK_SUM[_m ^ _low] + _low.bit_length()
+del _m, _low
+
+def _resolve_round_py(p1_card, p2_card, current_pot):
     """
     Returns (p1_points, p2_points, is_tie)
     """
@@ -14,6 +46,14 @@ def resolve_round_logic(p1_card, p2_card, current_pot):
     else:
         return 0, 0, True
 
+try:
+    # Optional: the round kernel sits in every minimax inner loop, so JIT it
+    # to native code when numba is installed.
+    from numba import njit
+    resolve_round_logic = njit(cache=True)(_resolve_round_py)
+except ImportError:
+    resolve_round_logic = _resolve_round_py
+
 # -----------------------------------------------------------------------------
 # SUPER INTELLIGENT BOT LOGIC (SmartBot)
 # -----------------------------------------------------------------------------
@@ -22,83 +62,150 @@ class SmartBot:
         self.name = "DeepGoof"
         # Memory of opponent's past moves relative to prize value
         self.opponent_history = {i: [] for i in range(1, 14)}
+        # Per-instance transposition table: the same sub-state is reached
+        # through many different move orders, so cache solved subtrees.
+        self._solve = functools.lru_cache(maxsize=None)(self._solve_impl)
+        # The same (hand, pot) situation recurs across turns; cache the
+        # predicted opponent-move distribution between them.
+        self._opponent_weights = functools.lru_cache(maxsize=512)(self._opponent_weights_impl)
 
     def record_move(self, prize_card, opponent_move):
         self.opponent_history[prize_card].append(opponent_move)
 
-    def decide_move(self, bot_hand, player_hand, current_pot_value, remaining_prizes, bot_score, player_score):
+    def decide_move(self, bot_mask, player_mask, current_pot_value, remaining_prizes, bot_score, player_score):
         """
         Decides the best move using either Minimax (Endgame) or Heuristic (Early Game).
+        Hands arrive as bitmasks (see FULL_HAND_MASK).
         """
         # 1. ENDGAME SOLVER: If state space is small, solve perfectly using recursion.
-        if len(bot_hand) <= 6:
-            return self.minimax_move(bot_hand, player_hand, current_pot_value, remaining_prizes, bot_score, player_score)
-        
+        if bot_mask.bit_count() <= 6:
+            return self.minimax_move(bot_mask, player_mask, current_pot_value, remaining_prizes, bot_score, player_score)
+
         # 2. PROBABILISTIC STRATEGY: Use heuristic payoff matrix for speed in early game.
-        return self.heuristic_move(bot_hand, player_hand, current_pot_value)
+        return self.heuristic_move(bot_mask, player_mask, current_pot_value)
 
-    def minimax_move(self, bot_hand, player_hand, current_pot, remaining_prizes, bot_score, player_score):
+    def minimax_move(self, bot_mask, player_mask, current_pot, remaining_prizes, bot_score, player_score):
         """ Recursive Minimax to find the optimal move assuming perfect play from opponent. """
+        _, best_card = self._solve(
+            bot_mask,
+            player_mask,
+            current_pot,
+            tuple(remaining_prizes),
+            bot_score - player_score
+        )
+        return best_card
+
+    def _solve_impl(self, bot_mask, player_mask, pot, prizes, score_diff):
+        """
+        Memoized minimax core. Hand masks are canonical and hashable, so
+        identical sub-states reached through different move orders hit the
+        cache, and only the score DIFFERENCE is tracked, which collapses
+        many equivalent states. Returns (utility, best_card).
+        """
+        bot_hand = _bits_to_list(bot_mask)
+        player_hand = _bits_to_list(player_mask)
+        # Solve to the end once hands are small; otherwise 1-ply + heuristic.
+        deep = len(bot_hand) <= 4
+        sum_b = _MASK_SUM[bot_mask]
+        sum_p = _MASK_SUM[player_mask]
+
+        if not deep and prizes and np is not None:
+            # The 1-ply + heuristic case is a pure payoff matrix: broadcast
+            # it instead of running the double Python loop.
+            B = np.array(bot_hand)[:, None]
+            P = np.array(player_hand)[None, :]
+            round_diff = np.where(B > P, pot, np.where(P > B, -pot, 0))
+            utility = score_diff + round_diff + (sum_b - B) - (sum_p - P)
+            worst = utility.min(axis=1)
+            i = int(worst.argmax())
+            return int(worst[i]), bot_hand[i]
+
         best_card = bot_hand[0]
-        max_min_utility = -float('inf') 
-        depth_limit = 99 if len(bot_hand) <= 4 else 1
-        candidates = sorted(bot_hand, reverse=True)
-        best_options = []
+        max_min_utility = -float('inf')
+        best_count = 0
 
-        for b in candidates:
-            min_utility = float('inf') 
+        for b in bot_hand:
+            min_utility = float('inf')
             for p in player_hand:
-                b_won, p_won, is_tie = resolve_round_logic(b, p, current_pot)
-                current_diff = b_won - p_won
-                future_diff = 0
-                if remaining_prizes:
-                    new_b = [x for x in bot_hand if x != b]
-                    new_p = [x for x in player_hand if x != p]
-                    future_diff = (sum(new_b) - sum(new_p))
-                
-                if is_tie and not remaining_prizes: current_diff = 0 
-                total_outcome = (bot_score - player_score) + current_diff + future_diff
-                if total_outcome < min_utility: min_utility = total_outcome
-            
+                b_won, p_won, is_tie = resolve_round_logic(b, p, pot)
+                diff = score_diff + b_won - p_won
+                if is_tie and not prizes:
+                    diff = score_diff  # Last pot is split: no swing either way
+
+                if not prizes:
+                    utility = diff
+                elif deep:
+                    carry = pot if is_tie else 0
+                    utility, _ = self._solve(bot_mask & ~(1 << (b - 1)),
+                                             player_mask & ~(1 << (p - 1)),
+                                             prizes[0] + carry, prizes[1:], diff)
+                else:
+                    # Only the sums of the remaining hands matter, so derive
+                    # them by subtraction instead of rebuilding the lists.
+                    utility = diff + (sum_b - b) - (sum_p - p)
+
+                if utility < min_utility: min_utility = utility
+
+            # Reservoir sampling (k=1): uniform pick among tied best moves
+            # without accumulating a candidate list.
             if min_utility > max_min_utility:
                 max_min_utility = min_utility
-                best_options = [b]
+                best_card = b
+                best_count = 1
             elif min_utility == max_min_utility:
-                best_options.append(b)
-        
-        return random.choice(best_options)
+                best_count += 1
+                if random.random() < 1.0 / best_count:
+                    best_card = b
 
-    def heuristic_move(self, bot_hand, player_hand, current_pot):
-        """ Calculates Expected Value (EV) based on predicted opponent moves. """
-        # Predict opponent based on pot
-        effective_val = min(current_pot, 15)
+        return max_min_utility, best_card
+
+    def _opponent_weights_impl(self, player_mask, pot_key):
+        """
+        Predicted opponent-move probabilities for a hand mask.
+        pot_key is min(pot, 11): all pots above 10 share one weight table
+        since the big-pot branch ignores the exact value.
+        Returns (cards_tuple, probs_tuple).
+        """
+        player_hand = _bits_to_list(player_mask)
+        top = player_hand[-1]
         total_w = 0
-        weights = {}
+        weights = []
         for c in player_hand:
             w = 1.0
-            if current_pot > 10:
-                if c >= max(player_hand) - 1: w += 3.0
+            if pot_key > 10:
+                if c >= top - 1: w += 3.0
                 if c < 5: w *= 0.1
             else:
-                if abs(c - effective_val) <= 1: w += 2.0
-            weights[c] = w
+                if abs(c - pot_key) <= 1: w += 2.0
+            weights.append(w)
             total_w += w
-            
-        best_card = bot_hand[0]
+        return tuple(player_hand), tuple(w / total_w for w in weights)
+
+    def heuristic_move(self, bot_mask, player_mask, current_pot):
+        """ Calculates Expected Value (EV) based on predicted opponent moves. """
+        opp_cards, opp_probs = self._opponent_weights(player_mask, min(current_pot, 11))
+
         best_ev = -float('inf')
-        
-        for my_card in bot_hand:
+        best_card = None
+        best_count = 0
+
+        for my_card in _bits_to_list(bot_mask):
             ev = 0
-            for opp_card in player_hand:
-                prob = weights[opp_card]/total_w
+            for opp_card, prob in zip(opp_cards, opp_probs):
                 b_pts, p_pts, is_tie = resolve_round_logic(my_card, opp_card, current_pot)
                 cost = my_card
                 u = -(cost*0.9) if is_tie else (b_pts - p_pts) - (cost*0.8)
                 ev += u * prob
-            ev += random.uniform(-0.1, 0.1)
-            if ev > best_ev:
+            # Reservoir sampling over near-equal EVs: uniform tie-break
+            # without building a candidate list.
+            if ev > best_ev + 1e-9:
                 best_ev = ev
                 best_card = my_card
+                best_count = 1
+            elif ev > best_ev - 1e-9:
+                best_count += 1
+                if random.random() < 1.0 / best_count:
+                    best_card = my_card
         return best_card
 
 # -----------------------------------------------------------------------------
@@ -111,12 +218,14 @@ class BidWiserGame:
         If len=1, Player 2 is Bot.
         If len=2, Player 2 is human.
         """
-        self.prizes = list(range(1, 14))
-        random.shuffle(self.prizes)
+        prizes = list(range(1, 14))
+        random.shuffle(prizes)
+        # deque: drawing the next prize is popleft() in O(1)
+        self.prizes = deque(prizes)
         
         # Player 1 (Host)
         self.p1_name = human_players[0]
-        self.p1_hand = list(range(1, 14))
+        self.p1_hand = FULL_HAND_MASK
         self.p1_score = 0
         self.p1_move = None # Waiting for move
 
@@ -130,13 +239,13 @@ class BidWiserGame:
             self.p2_is_bot = True
             self.bot = SmartBot()
             
-        self.p2_hand = list(range(1, 14))
+        self.p2_hand = FULL_HAND_MASK
         self.p2_score = 0
         self.p2_move = None # Waiting for move
         
         self.carry_over_pot = 0
         self.round_history = []
-        self.current_prize = self.prizes.pop(0)
+        self.current_prize = self.prizes.popleft()
         self.game_over = False
 
     def get_state(self):
@@ -145,16 +254,16 @@ class BidWiserGame:
             'carry_over': self.carry_over_pot,
             'total_pot': self.current_prize + self.carry_over_pot,
             'p1': {
-                'name': self.p1_name, 
-                'score': self.p1_score, 
-                'hand': self.p1_hand, 
+                'name': self.p1_name,
+                'score': self.p1_score,
+                'hand': _bits_to_list(self.p1_hand),
                 'has_moved': self.p1_move is not None
             },
             'p2': {
-                'name': self.p2_name, 
-                'score': self.p2_score, 
-                'hand': self.p2_hand, # EXPOSED SO HUMAN P2 CAN SEE IT
-                'hand_count': len(self.p2_hand),
+                'name': self.p2_name,
+                'score': self.p2_score,
+                'hand': _bits_to_list(self.p2_hand), # EXPOSED SO HUMAN P2 CAN SEE IT
+                'hand_count': self.p2_hand.bit_count(),
                 'has_moved': self.p2_move is not None,
                 'is_bot': self.p2_is_bot
             },
@@ -170,9 +279,9 @@ class BidWiserGame:
         
         # Identify who moved
         if player_name == self.p1_name:
-            if card in self.p1_hand: self.p1_move = card
+            if _has(self.p1_hand, card): self.p1_move = card
         elif player_name == self.p2_name and not self.p2_is_bot:
-            if card in self.p2_hand: self.p2_move = card
+            if _has(self.p2_hand, card): self.p2_move = card
             
         # Check if P2 is Bot. If P1 has moved, Bot moves instantly.
         if self.p2_is_bot and self.p1_move is not None:
@@ -195,9 +304,9 @@ class BidWiserGame:
         p2_card = self.p2_move
         pot_val = self.current_prize + self.carry_over_pot
         
-        # Remove cards
-        if p1_card in self.p1_hand: self.p1_hand.remove(p1_card)
-        if p2_card in self.p2_hand: self.p2_hand.remove(p2_card)
+        # Remove cards (clearing an already-clear bit is a no-op)
+        self.p1_hand &= ~(1 << (p1_card - 1))
+        self.p2_hand &= ~(1 << (p2_card - 1))
         
         # Determine Winner
         p1_pts, p2_pts, is_tie = resolve_round_logic(p1_card, p2_card, pot_val)
@@ -236,4 +345,4 @@ class BidWiserGame:
             self.game_over = True
             self.current_prize = 0
         else:
-            self.current_prize = self.prizes.pop(0)
\ No newline at end of file
+            self.current_prize = self.prizes.popleft()
\ No newline at end of file